@@ -0,0 +1,39 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+SCRIPT_PATH = Path(__file__).resolve().parent.parent / "scripts" / "create_final_working_model.py"
+BANKS = ["ICICI", "HDFC", "SBI", "AXIS", "KOTAK", "PNB", "BOB", "CANARA"]
+
+
+@pytest.fixture(scope="module")
+def model_script():
+    spec = importlib.util.spec_from_file_location("create_final_working_model", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def reference_bank(sms_text):
+    """The original per-bank substring loop"""
+    for bank in BANKS:
+        if bank.lower() in sms_text.lower():
+            return bank
+    return None
+
+
+@pytest.mark.parametrize("sms_text", [
+    "Rs 500 debited from HDFC Bank card XX1234",
+    "Rs 500 debited from KOTAK Bank card XX1234",  # Kelvin sign lowercases to 'k'
+    "Rs 500 debited from İCICI Bank card XX1234",  # Dotted capital I
+    "debited AXISBI",
+    "debited from hdfc, refund by ICICI",
+    "Rs 99 paid via UPI",
+])
+def test_bank_matches_reference_loop(model_script, sms_text):
+    result = model_script.fallback_classification(sms_text)
+    assert result["Bank"] == reference_bank(sms_text)